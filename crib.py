@@ -0,0 +1,276 @@
+# Copyright (C) 2015 by Ken Guyton.  All Rights Reserved.
+
+"""Find where a known plaintext crib could sit in a ciphertext.
+
+An Enigma machine never encrypts a letter to itself.  So a crib can only
+be at an offset where no ciphertext letter is the same as the crib
+letter lined up with it.  Ruling out the other offsets first saves
+trying every key at every offset.
+
+All offsets are checked at once with bitsets.  The distinct letters of
+the crib are given one bit each, up to 8 to a byte.  The ciphertext is
+translated to a byte string with a letter's bit set wherever that letter
+is, then read as one big int.  Shifting the int right by j bytes lines
+up the letter at crib position j with the offsets.  Masking each letter
+to its own bit and OR-ing them all together marks every ruled out
+offset.  The bytes that are still 0 are the surviving offsets.
+
+Long ciphertexts are handled in chunks, carrying the last len(crib) - 1
+letters of each chunk over to the next.  For a long intercept use
+iter_crib_positions(), which yields the offsets chunk by chunk and never
+holds more than one chunk's worth.  A short crib can leave most offsets
+standing, so find_crib_positions() keeps them as one byte per offset
+rather than as a list of ints.
+"""
+
+import binascii
+import bisect
+import itertools
+
+CHUNK_SIZE = 1 << 20
+
+# Map a byte of 0 to 1 and a byte of 1 to 0.
+INVERT_TABLE = bytes(bytearray([1, 0] + [0] * 254))
+
+
+def as_bytes(text):
+  """Return the text as bytes, encoding a str as ASCII if needed."""
+
+  if not isinstance(text, bytes):
+    text = text.encode('ascii')
+
+  return text
+
+
+def bytes_to_int(data):
+  """Convert bytes to an int, the first byte being the least significant."""
+
+  if hasattr(int, 'from_bytes'):
+    return int.from_bytes(data, 'little')
+
+  return int(binascii.hexlify(data[::-1]) or '0', 16)
+
+
+def int_to_bytes(num, length):
+  """Convert an int to length bytes, the first byte least significant."""
+
+  if hasattr(num, 'to_bytes'):
+    return num.to_bytes(length, 'little')
+
+  hex_str = '%x' % num
+  hex_str = '0' * (2 * length - len(hex_str)) + hex_str
+  return binascii.unhexlify(hex_str)[::-1]
+
+
+def letter_batches(crib):
+  """Split the distinct letters of the crib into batches of up to 8.
+
+  Each letter in a batch gets its own bit in a byte.
+
+  Args:
+    crib: bytes.
+  Returns:
+    A list of (table, letters) tuples.  The table is a translate table
+    that maps each letter of the batch to its bit and everything else to
+    0.  letters is a list of (bit, indexes) tuples, where indexes are the
+    positions of that letter in the crib.
+  """
+
+  indexes = {}
+  for index, byte in enumerate(bytearray(crib)):
+    indexes.setdefault(byte, []).append(index)
+
+  batches = []
+  distinct = sorted(indexes)
+  for start in range(0, len(distinct), 8):
+    table = bytearray(256)
+    letters = []
+    for bit_num, byte in enumerate(distinct[start:start + 8]):
+      table[byte] = 1 << bit_num
+      letters.append((1 << bit_num, indexes[byte]))
+    batches.append((bytes(table), letters))
+
+  return batches
+
+
+def chunks(ciphertext, chunk_size):
+  """Yield the ciphertext in chunks.
+
+  Args:
+    ciphertext: str or bytes, or an iterable of them such as an open file.
+    chunk_size: int.  The size of the chunks to cut a single str into.
+  Yields:
+    str or bytes chunks.
+  """
+
+  if isinstance(ciphertext, (bytes, type(u''))):
+    for start in range(0, len(ciphertext), chunk_size):
+      yield ciphertext[start:start + chunk_size]
+  else:
+    for chunk in ciphertext:
+      yield chunk
+
+
+def scan(data, batches, count, masks):
+  """Check the first count offsets of the crib in data.
+
+  Args:
+    data: bytes.  Ciphertext at least count + len(crib) - 1 long.
+    batches: list.  The letter_batches() of the crib.
+    count: int.  The number of offsets to check.
+    masks: dict.  A cache of the int with one bit set in every byte, keyed
+      by (bit, length).
+  Returns:
+    bytearray of length count, 1 where the crib can be and 0 where it
+    can't.
+  """
+
+  ruled_out = 0
+  for table, letters in batches:
+    letter_bits = bytes_to_int(data.translate(table))
+    for bit, indexes in letters:
+      lined_up = 0
+      for index in indexes:
+        lined_up |= letter_bits >> (8 * index)
+
+      mask = masks.get((bit, len(data)))
+      if mask is None:
+        mask = bytes_to_int(bytes(bytearray([bit])) * len(data))
+        masks[(bit, len(data))] = mask
+      ruled_out |= lined_up & mask
+
+  return bytearray(int_to_bytes(ruled_out, len(data))[:count].translate(
+      INVERT_TABLE))
+
+
+def iter_selectors(ciphertext, crib, chunk_size):
+  """Yield the result of checking each chunk of the ciphertext.
+
+  See iter_crib_positions() for the args.
+
+  Yields:
+    (base, selectors) tuples.  base is the offset of the chunk in the
+    ciphertext and selectors is the bytearray from scan().
+  """
+
+  crib = as_bytes(crib)
+  if not crib:
+    raise ValueError('The crib must not be empty.')
+
+  batches = letter_batches(crib)
+  masks = {}
+  overlap = len(crib) - 1
+  carry = b''
+  base = 0
+
+  for chunk in chunks(ciphertext, chunk_size):
+    data = carry + as_bytes(chunk)
+    count = len(data) - overlap
+    if count <= 0:
+      carry = data
+      continue
+
+    yield base, scan(data, batches, count, masks)
+
+    carry = data[count:]
+    base += count
+
+
+def iter_crib_positions(ciphertext, crib, chunk_size=CHUNK_SIZE):
+  """Yield each offset in the ciphertext where the crib could be.
+
+  Args:
+    ciphertext: str or bytes of capital letters, or an iterable of them
+      such as an open file.
+    crib: str or bytes.  The capital letters of the known plaintext.
+    chunk_size: int.  How much of a single str to check at once.
+  Yields:
+    int offsets in increasing order.
+  Raises:
+    ValueError: If the crib is empty.
+  """
+
+  for base, selectors in iter_selectors(ciphertext, crib, chunk_size):
+    for offset in itertools.compress(range(base, base + len(selectors)),
+                                     selectors):
+      yield offset
+
+
+class CribPositions(object):
+  """The offsets where a crib could be, kept as the selectors from scan().
+
+  That's one byte per offset checked, which is far smaller than a list
+  of ints when a short crib leaves most offsets standing.  The offsets
+  are only made into ints as they're iterated.
+  """
+
+  def __init__(self, chunks_of_selectors):
+    """Initialize with the chunks of selectors.
+
+    Args:
+      chunks_of_selectors: list of (base, selectors) tuples, as yielded by
+        iter_selectors().
+    """
+
+    self.bases = [base for base, unused_selectors in chunks_of_selectors]
+    self.selectors = [selectors
+                      for unused_base, selectors in chunks_of_selectors]
+    self.count = sum([selectors.count(b'\x01') for selectors in self.selectors])
+
+  def __len__(self):
+    return self.count
+
+  def __iter__(self):
+    for base, selectors in zip(self.bases, self.selectors):
+      for offset in itertools.compress(range(base, base + len(selectors)),
+                                       selectors):
+        yield offset
+
+  def __contains__(self, offset):
+    chunk_num = bisect.bisect_right(self.bases, offset) - 1
+    if chunk_num < 0:
+      return False
+
+    index = offset - self.bases[chunk_num]
+    selectors = self.selectors[chunk_num]
+    return index < len(selectors) and selectors[index] == 1
+
+
+def find_crib_positions(ciphertext, crib, chunk_size=CHUNK_SIZE):
+  """Return the offsets in the ciphertext where the crib could be.
+
+  See iter_crib_positions() for the args.
+
+  Returns:
+    A CribPositions.  Iterate over it for the int offsets in increasing
+    order.
+  """
+
+  return CribPositions(list(iter_selectors(ciphertext, crib, chunk_size)))
+
+
+def crib_fits(machine, ciphertext, crib, offset):
+  """Check whether a machine decrypts the ciphertext at offset to the crib.
+
+  The machine must be set to its start position for the whole message.
+  It's stepped through the first offset letters and then the crib.  To
+  check many offsets for one key, keyspace.search() decrypts the message
+  once instead.
+
+  Args:
+    machine: enigma.Machine.
+    ciphertext: str of capital letters.
+    crib: str of capital letters.
+    offset: int.  An offset from find_crib_positions().
+  Returns:
+    True if every letter of the crib matches, False if any doesn't or if
+    the crib runs past the end of the ciphertext.
+  """
+
+  if len(ciphertext) - offset < len(crib):
+    return False
+
+  for unused_letter in ciphertext[:offset]:
+    machine.rotor3.step()
+
+  return machine.encrypt(ciphertext[offset:offset + len(crib)]) == crib
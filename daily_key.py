@@ -0,0 +1,186 @@
+# Copyright (C) 2015 by Ken Guyton.  All Rights Reserved.
+
+"""Decrypt a day's traffic that shares one daily key.
+
+The daily key sets the rotor order, ring settings and plugboard.  For
+each message the operator set the rotors to a start position (the
+ground setting, Grundstellung) and typed a three letter message key
+twice.  That gave the six letter indicator.  Then the rotors were set
+to the message key and the body was typed.
+
+DailyKey builds the machine and its StateTables once for all of the
+messages.  Most indicators are decrypted with Machine.encrypt(), a table
+lookup per letter.  When many messages share a start position, the six
+tables for that start become translate tables instead, and each letter
+position of all their indicators is translated in one call.  The
+bodies are then decrypted from their message keys with Machine.encrypt(),
+which uses the same shared tables.
+"""
+
+import collections
+import keyspace
+
+Message = collections.namedtuple('Message', 'start indicator body')
+
+INDICATOR_LENGTH = 6
+
+# The fewest messages sharing a start that are worth building translate
+# tables for.  Smaller groups are looked up a letter at a time.  Building
+# the six translate tables costs about as much as 20 lookups.
+TRANSLATE_GROUP_SIZE = 20
+
+
+def translation(table):
+  """Convert a table of 26 int into a 256 char str for str.translate()."""
+
+  chars = [chr(num) for num in range(256)]
+  for num, output_num in enumerate(table):
+    chars[num + 65] = chr(output_num + 65)
+
+  return ''.join(chars)
+
+
+class DailyKey(object):
+  """A machine compiled for one daily key."""
+
+  def __init__(self, reflector, rotors, rings, plugboard_config=(),
+               ground_setting=None):
+    """Build the machine for the day.
+
+    Args:
+      reflector: str.  A name in keyspace.REFLECTORS.
+      rotors: tuple of three str.  Names in keyspace.ROTORS, left to right.
+      rings: str.  The three ring setting letters.
+      plugboard_config: A tuple of tuple pairs of str letters.
+      ground_setting: str.  The three letter start position for messages
+        that don't have their own, or None.
+    """
+
+    self.machine = keyspace.build_machine(reflector, rotors, plugboard_config)
+    self.rings = rings
+    self.ground_setting = ground_setting
+
+  def set_position(self, position):
+    """Set the rotors to a three letter position with the day's rings."""
+
+    keyspace.set_rotors(self.machine, self.rings, position)
+
+  def translations(self, start, count):
+    """Return translate tables for count letters typed from a start.
+
+    Args:
+      start: str.  A three letter start position.
+      count: int.  How many letters.
+    Returns:
+      A list of count str tables for str.translate().
+    """
+
+    self.set_position(start)
+    tables = []
+    for unused_count in range(count):
+      self.machine.rotor3.step()
+      tables.append(translation(self.machine.get_state_tables().table()))
+
+    return tables
+
+  def message_keys(self, messages):
+    """Decrypt the indicators of a batch of messages.
+
+    Args:
+      messages: sequence of Message.  A start of None means the daily
+        ground setting.
+    Returns:
+      A list with the three letter message key for each message, or None
+      where the indicator isn't six letters long or the two halves of the
+      decrypted indicator don't match.
+    Raises:
+      ValueError: If a message has no start and there's no ground setting.
+    """
+
+    by_start = collections.OrderedDict()
+    for message_num, message in enumerate(messages):
+      start = message.start or self.ground_setting
+      if start is None:
+        raise ValueError('Message %d has no start position.' % message_num)
+      if len(message.indicator) == INDICATOR_LENGTH:
+        by_start.setdefault(start, []).append(message_num)
+
+    keys = [None] * len(messages)
+    for start, message_nums in by_start.items():
+      if len(message_nums) >= TRANSLATE_GROUP_SIZE:
+        indicators = self.translate_indicators(
+            start, [messages[message_num].indicator
+                    for message_num in message_nums])
+      else:
+        indicators = [self.decrypt_indicator(start,
+                                             messages[message_num].indicator)
+                      for message_num in message_nums]
+
+      for message_num, indicator in zip(message_nums, indicators):
+        if indicator[:3] == indicator[3:]:
+          keys[message_num] = indicator[:3]
+
+    return keys
+
+  def decrypt_indicator(self, start, indicator):
+    """Decrypt one indicator with lookups into the shared tables.
+
+    Args:
+      start: str.  The three letter start position.
+      indicator: str.  The six letter indicator.
+    Returns:
+      The decrypted six letter str.
+    """
+
+    self.set_position(start)
+    return self.machine.encrypt(indicator)
+
+  def translate_indicators(self, start, indicators):
+    """Decrypt indicators that share a start, a letter position at a time.
+
+    Args:
+      start: str.  The three letter start position.
+      indicators: list of six letter str.
+    Returns:
+      A list of the decrypted six letter str.
+    """
+
+    columns = []
+    for letter_num, table in enumerate(
+        self.translations(start, INDICATOR_LENGTH)):
+      column = ''.join([indicator[letter_num] for indicator in indicators])
+      columns.append(column.translate(table))
+
+    return [''.join(letters) for letters in zip(*columns)]
+
+  def decrypt_body(self, message_key, body):
+    """Decrypt a message body from its message key.
+
+    Args:
+      message_key: str.  The three letter start position for the body.
+      body: str of capital letters.
+    Returns:
+      The plaintext str.
+    """
+
+    self.set_position(message_key)
+    return self.machine.encrypt(body)
+
+  def decrypt(self, messages):
+    """Decrypt the bodies of a batch of messages.
+
+    Args:
+      messages: sequence of Message.
+    Returns:
+      A list with the plaintext for each message, or None where its
+      indicator didn't decrypt to a doubled message key.
+    """
+
+    plaintexts = []
+    for message, message_key in zip(messages, self.message_keys(messages)):
+      if message_key is None:
+        plaintexts.append(None)
+      else:
+        plaintexts.append(self.decrypt_body(message_key, message.body))
+
+    return plaintexts
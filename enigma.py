@@ -23,6 +23,8 @@ REFLECTOR_A = 'EJMZALYXVBWFCRQUONTSPIKHGD'
 REFLECTOR_B = 'YRUHQSLDPXNGOKMIEBFZCWVJAT'
 REFLECTOR_C = 'FVPJIAOYEDRZXWGCTKUQSBNMHL'
 
+CHUNK_SIZE = 1 << 16
+
 
 class RotorMap(object):
   """An object representing a rotor which maps inputs to outputs.
@@ -135,12 +137,16 @@ class RotorShifter(object):
   """The shifter handles shifting and clicking of the rotor."""
 
   def __init__(self, rotor_map, next_shifter=None, shift_letter='A',
-               turnover_letter='Z'):
+               turnover_letter='Z', ring_letter='A'):
     """Initialize with a RotorMap.
 
     The turnover is the position in this rotor where the next rotor
     will be stepped.
 
+    The ring is the ring setting (Ringstellung).  It turns the wiring
+    relative to the letters shown and the turnover notch, so the wiring
+    is offset by shift - ring.
+
     The double_step property is a bool that indicates whether this rotor
     should do a double shift.  That means when it get's a step() call
     it send a step() to it's next_shifter before *and after* it steps
@@ -151,26 +157,33 @@ class RotorShifter(object):
       next_shifter: RotorShifter.  The shifter for the next rotor in the
         machine (that will be stepped by this rotor's notch).
       shift: int.  An initial shift position.
+      ring_letter: str.  The ring setting, 'A' for none.
     """
 
     self.rotor_map = rotor_map
     self.next_shifter = next_shifter
     self.shift = rotor_map.letter_to_num(shift_letter)
     self.turnover = rotor_map.letter_to_num(turnover_letter)
+    self.ring = rotor_map.letter_to_num(ring_letter)
     self.double_step = False
 
+  def wiring_offset(self):
+    """Return how far the wiring is turned, the shift less the ring."""
+
+    return (self.shift - self.ring) % 26
+
   def increment_letter_by_shift(self, letter):
-    """Step a letter by the shift amount and wrap around Z."""
+    """Step a letter by the wiring offset and wrap around Z."""
 
     num = self.rotor_map.letter_to_num(letter)
-    num = (num + self.shift) % 26
+    num = (num + self.shift - self.ring) % 26
     return self.rotor_map.num_to_letter(num)
 
   def decrement_letter_by_shift(self, letter):
-    """Unstep a letter by the shift amount and wrap around Z."""
+    """Unstep a letter by the wiring offset and wrap around Z."""
 
     num = self.rotor_map.letter_to_num(letter)
-    num = (num - self.shift) % 26
+    num = (num - self.shift + self.ring) % 26
     return self.rotor_map.num_to_letter(num)
 
   def flow(self, input_letter):
@@ -244,6 +257,20 @@ class RotorShifter(object):
 
     self.turnover = self.rotor_map.letter_to_num(letter)
 
+  def get_ring(self):
+    """Return the ring setting as a letter."""
+
+    return self.rotor_map.num_to_letter(self.ring)
+
+  def set_ring(self, letter):
+    """Set the ring setting.
+
+    Args:
+      letter: str. A single letter from 'A' to 'Z'.
+    """
+
+    self.ring = self.rotor_map.letter_to_num(letter)
+
 
 class Reflector(RotorMap):
   """The reflector at the end of the rotor sequence."""
@@ -284,6 +311,7 @@ class PlugBoard(RotorMap):
     normal_map = string.ascii_uppercase
     swapped_map = self.swap_seq_of_pairs(normal_map, config)
     RotorMap.__init__(self, swapped_map)
+    self.listeners = []
 
   def swap_pair(self, input_map, pair):
     """Swap the two letters in the pair in the map.
@@ -324,6 +352,85 @@ class PlugBoard(RotorMap):
 
     return current_map
 
+  def add_listener(self, listener):
+    """Register an object to be told when a plug is swapped or unswapped.
+
+    The listener must have a plug_swapped(first, second) method.  It's
+    called after the map has been changed, with the two letters as ints.
+
+    Args:
+      listener: An object with a plug_swapped() method, e.g. StateTables.
+    """
+
+    self.listeners.append(listener)
+
+  def remove_listener(self, listener):
+    """Stop telling a listener about plug changes.
+
+    Args:
+      listener: An object registered with add_listener().
+    """
+
+    self.listeners.remove(listener)
+
+  def is_plugged(self, letter):
+    """Return True if the letter is currently swapped with another."""
+
+    num = self.letter_to_num(letter)
+    return self.map[num] != num
+
+  def swap(self, first, second):
+    """Plug two unplugged letters together, changing the map in place.
+
+    Args:
+      first, second: str. Single, different letters 'A'--'Z'.
+    Raises:
+      ValueError: If the letters are the same or either is already plugged.
+    """
+
+    if first == second:
+      raise ValueError('Cannot swap %s with itself.' % first)
+    for letter in first, second:
+      if self.is_plugged(letter):
+        raise ValueError('%s is already plugged.' % letter)
+
+    first_num = self.letter_to_num(first)
+    second_num = self.letter_to_num(second)
+    self._set_pair(first_num, second_num, second_num, first_num)
+
+  def unswap(self, first, second):
+    """Remove the plug between two letters, changing the map in place.
+
+    Args:
+      first, second: str. Single letters 'A'--'Z' that are swapped with
+        each other.
+    Raises:
+      ValueError: If the letters aren't plugged to each other.
+    """
+
+    first_num = self.letter_to_num(first)
+    second_num = self.letter_to_num(second)
+    if first_num == second_num or self.map[first_num] != second_num:
+      raise ValueError('%s and %s are not plugged together.' %
+                       (first, second))
+
+    self._set_pair(first_num, second_num, first_num, second_num)
+
+  def _set_pair(self, first, second, first_value, second_value):
+    """Set two entries of the map and rev_map and notify the listeners.
+
+    Args:
+      first, second: int.  The two letters being changed.
+      first_value, second_value: int.  Their new outputs.
+    """
+
+    for a_map in self.map, self.rev_map:
+      a_map[first] = first_value
+      a_map[second] = second_value
+
+    for listener in self.listeners:
+      listener.plug_swapped(first, second)
+
 
 class Machine(object):
   """The enigma machine with all of the parts assembled."""
@@ -342,6 +449,8 @@ class Machine(object):
     self.rotor3 = rotor3
     self.reflector = reflector
     self.plugboard = plugboard
+    self.state_tables = None
+    self.state_tables_parts = None
 
   def step_and_flow(self, input_letter):
     """Follow the current flow through the mapping of a single rotor.
@@ -360,14 +469,40 @@ class Machine(object):
     """
 
     self.rotor3.step()
+    return self.flow(input_letter)
+
+  def flow(self, input_letter):
+    """Follow the current flow through the whole machine without stepping.
+
+    Args:
+      input_letter: str of single char A--Z.
+    Returns:
+      An output letter as a str.
+    """
+
     after_pb = self.plugboard.flow(input_letter)
-    phase1 = self.rotor1.flow(self.rotor2.flow(self.rotor3.flow(after_pb)))
+    phase2 = self.rotor_flow(after_pb)
+    final = self.plugboard.reverse_flow(phase2)
+
+    return final
+
+  def rotor_flow(self, input_letter):
+    """Follow the flow through the rotors and reflector only.
+
+    This is everything between the two passes through the plugboard.
+
+    Args:
+      input_letter: str of single char A--Z.
+    Returns:
+      An output letter as a str.
+    """
+
+    phase1 = self.rotor1.flow(self.rotor2.flow(self.rotor3.flow(input_letter)))
     refl = self.reflector.flow(phase1)
     phase2 = self.rotor3.reverse_flow(self.rotor2.reverse_flow(
         self.rotor1.reverse_flow(refl)))
-    final = self.plugboard.reverse_flow(phase2)
 
-    return final
+    return phase2
 
   def stream(self, input_stream):
     """Process a stream of data from a generator as a generator.
@@ -381,3 +516,260 @@ class Machine(object):
 
     for input_letter in input_stream:
       yield self.step_and_flow(input_letter)
+
+  def parts(self):
+    """Return the rotors, reflector and plugboard as a tuple."""
+
+    return (self.rotor1, self.rotor2, self.rotor3, self.reflector,
+            self.plugboard)
+
+  def get_state_tables(self):
+    """Return the StateTables for this machine.
+
+    They're created the first time and again if any part is replaced.
+    """
+
+    parts = self.parts()
+    if self.state_tables is None or self.state_tables_parts != parts:
+      if self.state_tables is not None:
+        self.state_tables.close()
+      self.state_tables = StateTables(self)
+      self.state_tables_parts = parts
+
+    return self.state_tables
+
+  def encrypt(self, text):
+    """Encrypt a whole str, stepping the rotors for each letter.
+
+    This gives the same result as the stream() but looks up each letter
+    with StateTables.lookup() instead of following the flow through each
+    part.
+
+    Args:
+      text: str of capital letters 'A'--'Z'.
+    Returns:
+      The encrypted str.
+    """
+
+    lookup = self.get_state_tables().lookup
+    offset1 = self.rotor1.wiring_offset
+    offset2 = self.rotor2.wiring_offset
+    offset3 = self.rotor3.wiring_offset
+    step = self.rotor3.step
+    letters = string.ascii_uppercase
+
+    output = []
+    for letter in text:
+      step()
+      output.append(letters[lookup((offset1(), offset2(), offset3()),
+                                   ord(letter) - 65)])
+
+    return ''.join(output)
+
+  def stream_chunks(self, input_chunks, chunk_size=CHUNK_SIZE):
+    """Encrypt an iterable of chunks, yielding encrypted chunks.
+
+    The rotors carry on from one chunk to the next, so the joined output
+    is the same as from encrypt() or stream() on the joined input.
+
+    Args:
+      input_chunks: iterable of text, bytes or bytearray of capital
+        letters, such as an open file.
+      chunk_size: int.  Input chunks longer than this are split.
+    Yields:
+      The encrypted chunks, of the same type as the input chunks.
+    """
+
+    for chunk in input_chunks:
+      for start in range(0, len(chunk), chunk_size):
+        piece = chunk[start:start + chunk_size]
+        if isinstance(piece, str):
+          yield self.encrypt(piece)
+        elif isinstance(piece, type(u'')):
+          yield type(u'')(self.encrypt(piece))
+        else:
+          yield type(piece)(self.encrypt(piece.decode('ascii')).encode('ascii'))
+
+
+class StateTables(object):
+  """Substitution tables for a Machine, compiled once per rotor position.
+
+  A table is a list of 26 ints that maps an input letter to the output
+  letter for the whole machine, plugboard included, with the rotors in
+  one position.  Looking up a table is much cheaper than following the
+  flow through each part of the machine.  The position is taken from the
+  rotors' wiring offsets, so a table is shared by every ring setting and
+  shift that turns the wiring the same way.
+
+  Next to each table we keep the core table for the rotors and reflector
+  alone.  When a plug is swapped or unswapped the tables are patched in
+  place rather than rebuilt.  Only the entries for the two letters and
+  for the two letters that used to map to them can change, so that's at
+  most four entries per table.
+
+  The tables listen to the machine's plugboard.  If the plugboard object
+  is replaced they're stale, and Machine.get_state_tables() closes them
+  and creates new ones.
+  """
+
+  def __init__(self, machine):
+    """Initialize with the machine, compiling no tables yet.
+
+    Args:
+      machine: Machine.
+    """
+
+    self.machine = machine
+    self.tables = {}
+    self.core_tables = {}
+    self.stages = {}
+    self.seen = set()
+    self.plugboard = machine.plugboard
+    self.plugboard.add_listener(self)
+
+  def close(self):
+    """Stop listening to the plugboard, for tables that won't be used."""
+
+    self.plugboard.remove_listener(self)
+
+  def position(self):
+    """Return the current rotor position as a tuple of three int offsets."""
+
+    return (self.machine.rotor1.wiring_offset(),
+            self.machine.rotor2.wiring_offset(),
+            self.machine.rotor3.wiring_offset())
+
+  def lookup(self, position, num):
+    """Return the output for one letter at a rotor position.
+
+    A position's table is compiled the second time the position is looked
+    up.  The first time, the letter is followed through the machine on
+    its own, since a short text may never come back to that position.
+
+    Args:
+      position: tuple of three int.  The rotors' wiring offsets.
+      num: int.  The input letter, 0--25.
+    Returns:
+      The output letter as an int.
+    """
+
+    table = self.tables.get(position)
+    if table is None:
+      if position not in self.seen:
+        self.seen.add(position)
+        return self.flow_num(position, num)
+      table = self.compile(position)
+
+    return table[num]
+
+  def table(self):
+    """Return the whole table for the current rotor position.
+
+    This is for callers that need all 26 letters at once, so the table
+    is compiled straight away rather than on the second lookup().
+
+    Returns:
+      A list of 26 int.
+    """
+
+    position = self.position()
+    table = self.tables.get(position)
+    if table is None:
+      table = self.compile(position)
+
+    return table
+
+  def stage(self, index, offset):
+    """Return one rotor's forward and reverse maps at a wiring offset.
+
+    They're computed once per rotor and offset, 78 pairs at most.
+
+    Args:
+      index: int.  0, 1 or 2 for rotor1, rotor2 or rotor3.
+      offset: int.  The wiring offset.
+    Returns:
+      A (forward, reverse) tuple of lists of 26 int.
+    """
+
+    stage = self.stages.get((index, offset))
+    if stage is None:
+      rotor_shifter = (self.machine.rotor1, self.machine.rotor2,
+                       self.machine.rotor3)[index]
+      rotor_map = rotor_shifter.rotor_map
+      stage = ([(rotor_map.map[(num + offset) % 26] - offset) % 26
+                for num in range(26)],
+               [(rotor_map.rev_map[(num + offset) % 26] - offset) % 26
+                for num in range(26)])
+      self.stages[(index, offset)] = stage
+
+    return stage
+
+  def compile(self, position):
+    """Compile and store the tables for a rotor position.
+
+    This follows the same flow as Machine.rotor_flow(), but with ints
+    for all 26 letters at once.
+
+    Args:
+      position: tuple of three int.  The rotors' wiring offsets.
+    Returns:
+      The compiled table, a list of 26 int.
+    """
+
+    forward1, reverse1 = self.stage(0, position[0])
+    forward2, reverse2 = self.stage(1, position[1])
+    forward3, reverse3 = self.stage(2, position[2])
+    refl_map = self.machine.reflector.map
+
+    core = [reverse3[reverse2[reverse1[refl_map[
+                forward1[forward2[forward3[num]]]]]]]
+            for num in range(26)]
+    pb_map = self.plugboard.map
+    table = [pb_map[core[pb_map[num]]] for num in range(26)]
+
+    self.core_tables[position] = core
+    self.tables[position] = table
+
+    return table
+
+  def flow_num(self, position, num):
+    """Follow one letter through the whole machine without a table.
+
+    This doesn't build the stage() maps either, so a position that's only
+    used once costs nothing to cache.
+
+    Args:
+      position: tuple of three int.  The rotors' wiring offsets.
+      num: int.  The input letter, 0--25.
+    Returns:
+      The output letter as an int.
+    """
+
+    machine = self.machine
+    rotor_maps = (machine.rotor1.rotor_map, machine.rotor2.rotor_map,
+                  machine.rotor3.rotor_map)
+    pb_map = self.plugboard.map
+
+    num = pb_map[num]
+    for index in 2, 1, 0:
+      offset = position[index]
+      num = (rotor_maps[index].map[(num + offset) % 26] - offset) % 26
+    num = machine.reflector.map[num]
+    for index in 0, 1, 2:
+      offset = position[index]
+      num = (rotor_maps[index].rev_map[(num + offset) % 26] - offset) % 26
+
+    return pb_map[num]
+
+  def plug_swapped(self, first, second):
+    """Patch every compiled table after a plugboard change.
+
+    Args:
+      first, second: int.  The two letters whose plug changed.
+    """
+
+    pb_map = self.plugboard.map
+    for position, table in self.tables.items():
+      core = self.core_tables[position]
+      for num in set((first, second, table[first], table[second])):
+        table[num] = pb_map[core[pb_map[num]]]
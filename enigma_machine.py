@@ -62,7 +62,7 @@ def main():
   while line:
     cleaned_line = clean_input(line)
     print(cleaned_line)
-    print(''.join(list(machine.stream(cleaned_line))))
+    print(machine.encrypt(cleaned_line))
     line = sys.stdin.readline()
 
 
@@ -0,0 +1,375 @@
+# Copyright (C) 2015 by Ken Guyton.  All Rights Reserved.
+
+"""Enumerate machine keys for a search, split into resumable shards.
+
+A key is a reflector, a rotor order, ring settings and start positions.
+Every key in a KeySpace has an index, and the keys are ordered with the
+start positions changing fastest, then the ring settings, then the rotor
+order and finally the reflector.  So consecutive keys nearly always use
+the same rotors and reflector, and a Loader can keep using one machine
+and its StateTables for them.
+
+shard(k, n) takes the kth of n contiguous slices of the indices.  The
+slices depend only on the KeySpace arguments and n, so any number of
+processes or hosts can each work on their own k with no coordinator.
+A shard given a checkpoint directory writes the next index to do to a
+small file in it, named for k and n, and starts from there next time.
+The file also holds a fingerprint of the KeySpace, so a shard of some
+other KeySpace won't resume from it.  A directory shared between hosts
+works the same way as a local one.
+"""
+
+import collections
+import crib
+import enigma
+import hashlib
+import itertools
+import json
+import os
+import string
+
+ROTORS = {
+    'I': (enigma.ENIGMA_I_1930, 'Q'),
+    'II': (enigma.ENIGMA_II_1930, 'E'),
+    'III': (enigma.ENIGMA_III_1930, 'V'),
+}
+ROTOR_NAMES = ('I', 'II', 'III')
+
+REFLECTORS = {
+    'A': enigma.REFLECTOR_A,
+    'B': enigma.REFLECTOR_B,
+    'C': enigma.REFLECTOR_C,
+}
+REFLECTOR_NAMES = ('A', 'B', 'C')
+
+POSITIONS = 26 ** 3
+CHECKPOINT_EVERY = 1000
+
+Key = collections.namedtuple('Key', 'reflector rotors rings positions')
+
+
+def num_to_letters(num):
+  """Convert an int 0--17575 to three letters, the last changing fastest."""
+
+  letters = []
+  for unused_count in range(3):
+    num, letter_num = divmod(num, 26)
+    letters.append(string.ascii_uppercase[letter_num])
+
+  return ''.join(reversed(letters))
+
+
+def all_letter_triples():
+  """Return every three letter str from 'AAA' to 'ZZZ' in order."""
+
+  return [''.join(letters)
+          for letters in itertools.product(string.ascii_uppercase, repeat=3)]
+
+
+def build_machine(reflector, rotors, plugboard_config=()):
+  """Assemble a machine from reflector and rotor names.
+
+  The rings and positions are all 'A'.
+
+  Args:
+    reflector: str.  A name in REFLECTORS.
+    rotors: tuple of three str.  Names in ROTORS, from left to right.  The
+      last is the fast rotor.
+    plugboard_config: A tuple of tuple pairs of str letters.
+  Returns:
+    An enigma.Machine.
+  """
+
+  shifters = []
+  next_shifter = None
+  for name in rotors:
+    alpha_seq, turnover_letter = ROTORS[name]
+    next_shifter = enigma.RotorShifter(enigma.RotorMap(alpha_seq),
+                                       next_shifter=next_shifter,
+                                       turnover_letter=turnover_letter)
+    shifters.append(next_shifter)
+
+  shifters[1].double_step = True
+
+  return enigma.Machine(rotor1=shifters[0],
+                        rotor2=shifters[1],
+                        rotor3=shifters[2],
+                        reflector=enigma.Reflector(REFLECTORS[reflector]),
+                        plugboard=enigma.PlugBoard(plugboard_config))
+
+
+def set_rotors(machine, rings, positions):
+  """Set a machine's rings and rotor positions.
+
+  Args:
+    machine: enigma.Machine.
+    rings: str.  Three ring setting letters, left to right.
+    positions: str.  Three position letters, left to right.
+  """
+
+  rotor_shifters = (machine.rotor1, machine.rotor2, machine.rotor3)
+  for rotor_shifter, ring, position in zip(rotor_shifters, rings, positions):
+    rotor_shifter.set_ring(ring)
+    rotor_shifter.set_shift(position)
+
+
+def set_key(machine, key):
+  """Set a machine's rings and rotor positions to those of a key."""
+
+  set_rotors(machine, key.rings, key.positions)
+
+
+class Loader(object):
+  """Set up machines for keys, reusing one while the rotors don't change.
+
+  The machine's StateTables are kept with it, so tables compiled for one
+  key are used again for the next.  Only the most recent machine is kept.
+  """
+
+  def __init__(self, plugboard_config=()):
+    """Initialize with the plugboard config used for every key.
+
+    Args:
+      plugboard_config: A tuple of tuple pairs of str letters.
+    """
+
+    self.plugboard_config = plugboard_config
+    self.parts = None
+    self.machine = None
+    self.state_tables = None
+
+  def load(self, key):
+    """Return a machine set to a key.
+
+    Args:
+      key: Key.
+    Returns:
+      A (machine, state_tables) tuple.  Both are reused on the next call
+      if it has the same reflector and rotors.
+    """
+
+    parts = (key.reflector, key.rotors)
+    if parts != self.parts:
+      self.machine = build_machine(key.reflector, key.rotors,
+                                   self.plugboard_config)
+      self.state_tables = self.machine.get_state_tables()
+      self.parts = parts
+
+    set_key(self.machine, key)
+
+    return self.machine, self.state_tables
+
+
+class KeySpace(object):
+  """A deterministic, indexed sequence of keys."""
+
+  def __init__(self, rotor_names=ROTOR_NAMES, reflector_names=REFLECTOR_NAMES,
+               ring_settings=None):
+    """Initialize with the parts to choose from.
+
+    Args:
+      rotor_names: sequence of str.  Names in ROTORS.  Every order of
+        three of them is used.
+      reflector_names: sequence of str.  Names in REFLECTORS.
+      ring_settings: sequence of three letter str, or None for all of
+        them.
+    """
+
+    self.reflector_names = tuple(reflector_names)
+    self.orders = list(itertools.permutations(rotor_names, 3))
+    if ring_settings is None:
+      ring_settings = all_letter_triples()
+    self.ring_settings = list(ring_settings)
+
+  def __len__(self):
+    return (len(self.reflector_names) * len(self.orders) *
+            len(self.ring_settings) * POSITIONS)
+
+  def __iter__(self):
+    index = 0
+    while index < len(self):
+      yield self.key(index)
+      index += 1
+
+  def key(self, index):
+    """Return the key with an index.
+
+    Args:
+      index: int.  From 0 to len(self) - 1.
+    Returns:
+      A Key.
+    """
+
+    rest, position = divmod(index, POSITIONS)
+    rest, ring = divmod(rest, len(self.ring_settings))
+    reflector, order = divmod(rest, len(self.orders))
+
+    return Key(reflector=self.reflector_names[reflector],
+               rotors=self.orders[order],
+               rings=self.ring_settings[ring],
+               positions=num_to_letters(position))
+
+  def fingerprint(self):
+    """Return a hex digest of the reflectors, rotor orders and rings.
+
+    Two KeySpaces with the same fingerprint number their keys the same
+    way, so a checkpoint from one is good for the other.
+    """
+
+    parts = json.dumps([list(self.reflector_names),
+                        [list(order) for order in self.orders],
+                        self.ring_settings])
+    return hashlib.sha1(parts.encode('ascii')).hexdigest()
+
+  def shard(self, k, n, checkpoint_dir=None,
+            checkpoint_every=CHECKPOINT_EVERY):
+    """Return the kth of n shards of the keys.
+
+    See Shard for the args.
+    """
+
+    return Shard(self, k, n, checkpoint_dir, checkpoint_every)
+
+
+class Shard(object):
+  """A contiguous slice of a KeySpace that can checkpoint its progress."""
+
+  def __init__(self, keyspace, k, n, checkpoint_dir=None,
+               checkpoint_every=CHECKPOINT_EVERY):
+    """Initialize the shard, resuming from its checkpoint if there is one.
+
+    Args:
+      keyspace: KeySpace.
+      k: int.  Which shard this is, from 0 to n - 1.
+      n: int.  How many shards the keys are split into.
+      checkpoint_dir: str.  A directory for the checkpoint file, or None
+        for no checkpoints.
+      checkpoint_every: int.  How many keys to do between checkpoints.
+    Raises:
+      ValueError: If k is out of range, checkpoint_every is less than 1,
+        or the checkpoint file is for a different KeySpace or slice of
+        keys.
+    """
+
+    if not 0 <= k < n:
+      raise ValueError('Shard %d is not in 0--%d.' % (k, n - 1))
+    if checkpoint_every < 1:
+      raise ValueError('checkpoint_every must be at least 1, not %d.' %
+                       checkpoint_every)
+
+    self.keyspace = keyspace
+    self.fingerprint = keyspace.fingerprint()
+    self.k = k
+    self.n = n
+    self.start = k * len(keyspace) // n
+    self.stop = (k + 1) * len(keyspace) // n
+    self.checkpoint_every = checkpoint_every
+
+    if checkpoint_dir is None:
+      self.checkpoint_path = None
+    else:
+      self.checkpoint_path = os.path.join(checkpoint_dir,
+                                          'shard-%d-of-%d.json' % (k, n))
+
+    self.next_index = self.read_checkpoint()
+
+  def __len__(self):
+    return self.stop - self.start
+
+  def __iter__(self):
+    """Yield the keys not done yet, checkpointing as it goes.
+
+    A key counts as done once the next one is asked for.  After a kill,
+    at most checkpoint_every keys are done again, and none are skipped.
+
+    Yields:
+      (index, key) tuples.
+    """
+
+    count = 0
+    while self.next_index < self.stop:
+      yield self.next_index, self.keyspace.key(self.next_index)
+      self.next_index += 1
+      count += 1
+      if count % self.checkpoint_every == 0:
+        self.write_checkpoint()
+
+    self.write_checkpoint()
+
+  def is_done(self):
+    """Return True if every key in the shard has been done."""
+
+    return self.next_index >= self.stop
+
+  def read_checkpoint(self):
+    """Return the next index from the checkpoint file, or the start."""
+
+    if self.checkpoint_path is None or not os.path.exists(
+        self.checkpoint_path):
+      return self.start
+
+    with open(self.checkpoint_path) as checkpoint_file:
+      checkpoint = json.load(checkpoint_file)
+
+    if checkpoint.get('keyspace') != self.fingerprint:
+      raise ValueError('%s is for a different KeySpace.' %
+                       self.checkpoint_path)
+
+    if (checkpoint['start'], checkpoint['stop']) != (self.start, self.stop):
+      raise ValueError('%s is for keys %d--%d, not %d--%d.' % (
+          self.checkpoint_path, checkpoint['start'], checkpoint['stop'],
+          self.start, self.stop))
+
+    return checkpoint['next']
+
+  def write_checkpoint(self):
+    """Write the next index to the checkpoint file, if there is one.
+
+    The file is written under a temporary name and renamed over the old
+    one, so a kill while writing leaves the previous checkpoint intact.
+    """
+
+    if self.checkpoint_path is None:
+      return
+
+    checkpoint = {'keyspace': self.fingerprint, 'start': self.start,
+                  'stop': self.stop, 'next': self.next_index}
+    temp_path = self.checkpoint_path + '.tmp'
+    with open(temp_path, 'w') as checkpoint_file:
+      json.dump(checkpoint, checkpoint_file)
+    os.rename(temp_path, self.checkpoint_path)
+
+
+def search(keys, ciphertext, crib_text, offsets=None, plugboard_config=()):
+  """Find the keys that decrypt the crib at one of the offsets.
+
+  Each key decrypts the ciphertext once.  The crib is then looked for in
+  the plaintext with str.find(), and each match is kept if its offset is
+  one of the offsets.
+
+  Args:
+    keys: iterable of Key.  For a Shard, (key for index, key in shard).
+    ciphertext: str of capital letters.
+    crib_text: str of capital letters.
+    offsets: A container of int offsets such as a crib.CribPositions, or
+      None to scan the ciphertext for them.  An iterator is read into a
+      set.
+    plugboard_config: A tuple of tuple pairs of str letters.
+  Yields:
+    (key, offset) tuples for each match.
+  """
+
+  if offsets is None:
+    offsets = crib.find_crib_positions(ciphertext, crib_text)
+  elif iter(offsets) is offsets:
+    offsets = set(offsets)
+
+  loader = Loader(plugboard_config)
+  for key in keys:
+    machine, unused_state_tables = loader.load(key)
+    plaintext = machine.encrypt(ciphertext)
+    offset = plaintext.find(crib_text)
+    while offset != -1:
+      if offset in offsets:
+        yield key, offset
+      offset = plaintext.find(crib_text, offset + 1)
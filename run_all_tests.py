@@ -6,7 +6,7 @@
 
 import os
 
-TESTS = ('enigma', 'shifter')
+TESTS = ('enigma', 'shifter', 'crib', 'keyspace', 'daily_key')
 
 
 def run_test(test_name):
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# Copyright (C) 2015 by Ken Guyton.  All Rights Reserved.
+
+"""Test the crib placement module."""
+
+import crib
+import enigma_machine
+import io
+import random
+import string
+import unittest
+
+
+def brute_force_positions(ciphertext, crib_text):
+  """Find the crib positions one offset at a time."""
+
+  positions = []
+  for offset in range(len(ciphertext) - len(crib_text) + 1):
+    lined_up = zip(ciphertext[offset:], crib_text)
+    if all(cipher_letter != crib_letter
+           for cipher_letter, crib_letter in lined_up):
+      positions.append(offset)
+
+  return positions
+
+
+class TestCrib(unittest.TestCase):
+  def setUp(self):
+    rand = random.Random(1930)
+    self.ciphertext = ''.join(
+        [rand.choice(string.ascii_uppercase) for unused_count in range(500)])
+
+  def test_find_crib_positions(self):
+    self.assertEqual(list(crib.find_crib_positions('ABCAB', 'AB')), [1, 2])
+    self.assertEqual(list(crib.find_crib_positions('ABCAB', 'C')),
+                     [0, 1, 3, 4])
+
+  def test_crib_positions(self):
+    positions = crib.find_crib_positions(self.ciphertext, 'WETTER', 50)
+    expected = brute_force_positions(self.ciphertext, 'WETTER')
+    self.assertEqual(len(positions), len(expected))
+    for offset in range(-1, len(self.ciphertext) + 1):
+      self.assertEqual(offset in positions, offset in expected)
+
+  def test_crib_longer_than_ciphertext(self):
+    self.assertEqual(list(crib.find_crib_positions('ABC', 'WXYZ')), [])
+
+  def test_empty_crib(self):
+    self.assertRaises(ValueError, crib.find_crib_positions, 'ABC', '')
+
+  def test_matches_brute_force(self):
+    crib_text = 'WETTERVORHERSAGE'
+    self.assertEqual(
+        list(crib.find_crib_positions(self.ciphertext, crib_text)),
+        brute_force_positions(self.ciphertext, crib_text))
+
+  def test_chunks(self):
+    crib_text = 'KEINEBESONDEREN'
+    expected = brute_force_positions(self.ciphertext, crib_text)
+    for chunk_size in 1, 7, 15, 64:
+      self.assertEqual(
+          list(crib.iter_crib_positions(self.ciphertext, crib_text,
+                                        chunk_size)),
+          expected)
+
+  def test_file(self):
+    stream = io.BytesIO(self.ciphertext.encode('ascii'))
+    chunks = iter(lambda: stream.read(37), b'')
+    self.assertEqual(list(crib.iter_crib_positions(chunks, 'OBERKOMMANDO')),
+                     brute_force_positions(self.ciphertext, 'OBERKOMMANDO'))
+
+  def test_crib_fits(self):
+    ciphertext = ''.join(enigma_machine.create_machine().stream(
+        'XXXXXWETTERBERICHTXXX'))
+
+    positions = crib.find_crib_positions(ciphertext, 'WETTERBERICHT')
+    self.assertTrue(5 in positions)
+
+    fits = [offset for offset in positions
+            if crib.crib_fits(enigma_machine.create_machine(), ciphertext,
+                              'WETTERBERICHT', offset)]
+    self.assertEqual(fits, [5])
+
+  def test_crib_fits_past_end(self):
+    self.assertFalse(crib.crib_fits(enigma_machine.create_machine(),
+                                    'ABCDE', 'XYZ', 3))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# Copyright (C) 2015 by Ken Guyton.  All Rights Reserved.
+
+"""Test the daily key batch decryption module."""
+
+import daily_key
+import keyspace
+import unittest
+
+ROTORS = ('II', 'I', 'III')
+RINGS = 'BUL'
+PLUGBOARD_CONFIG = (('A', 'E'), ('M', 'Y'), ('Q', 'T'))
+
+
+def encrypt_message(start, message_key, plaintext):
+  """Encrypt a message the way an operator would, one letter at a time."""
+
+  machine = keyspace.build_machine('B', ROTORS, PLUGBOARD_CONFIG)
+  keyspace.set_rotors(machine, RINGS, start)
+  indicator = ''.join(machine.stream(message_key * 2))
+  keyspace.set_rotors(machine, RINGS, message_key)
+  body = ''.join(machine.stream(plaintext))
+
+  return daily_key.Message(start=start, indicator=indicator, body=body)
+
+
+class TestDailyKey(unittest.TestCase):
+  def setUp(self):
+    self.daily_key = daily_key.DailyKey('B', ROTORS, RINGS, PLUGBOARD_CONFIG,
+                                        ground_setting='FOL')
+    self.plaintexts = ['ANXOBERKOMMANDO', 'WETTERBERICHT', 'KEINEBESONDEREN',
+                       'ANGRIFFBEIMORGENGRAUEN']
+    self.message_keys = ['XYZ', 'QQB', 'ABC', 'ZZZ']
+    self.starts = ['FOL', 'GKD', 'FOL', 'JLR']
+    self.messages = [
+        encrypt_message(start, message_key, plaintext)
+        for start, message_key, plaintext in zip(
+            self.starts, self.message_keys, self.plaintexts)]
+
+  def test_translation(self):
+    table = daily_key.translation(list(range(1, 26)) + [0])
+    self.assertEqual('HAL9000'.translate(table), 'IBM9000')
+
+  def test_message_keys(self):
+    self.assertEqual(self.daily_key.message_keys(self.messages),
+                     self.message_keys)
+
+  def test_ground_setting(self):
+    message = self.messages[0]._replace(start=None)
+    self.assertEqual(self.daily_key.message_keys([message]), ['XYZ'])
+
+  def test_no_start(self):
+    self.daily_key.ground_setting = None
+    message = self.messages[0]._replace(start=None)
+    self.assertRaises(ValueError, self.daily_key.message_keys, [message])
+
+  def test_garbled_indicator(self):
+    indicator = self.messages[1].indicator
+    garbled = indicator[:4] + ('A' if indicator[4] != 'A' else 'B') + (
+        indicator[5])
+    self.messages[1] = self.messages[1]._replace(indicator=garbled)
+    self.assertEqual(self.daily_key.decrypt(self.messages),
+                     [self.plaintexts[0], None] + self.plaintexts[2:])
+
+  def test_decrypt(self):
+    self.assertEqual(self.daily_key.decrypt(self.messages), self.plaintexts)
+
+  def test_distinct_starts(self):
+    starts = ['AAA', 'QEV', 'ZZZ', 'MKB', 'EGX']
+    message_keys = ['PLM', 'ZZA', 'QQQ', 'DEF', 'ABA']
+    messages = [encrypt_message(start, message_key, 'KEINEBESONDEREN')
+                for start, message_key in zip(starts, message_keys)]
+    self.assertEqual(self.daily_key.message_keys(messages), message_keys)
+
+  def test_shared_start(self):
+    message_keys = ['%s%sQ' % (first, second)
+                    for first in 'ABCDE' for second in 'VWXYZ']
+    messages = [encrypt_message('FOL', message_key, 'ANX')
+                for message_key in message_keys]
+    self.assertTrue(len(messages) >= daily_key.TRANSLATE_GROUP_SIZE)
+    self.assertEqual(self.daily_key.message_keys(messages), message_keys)
+
+  def test_wrong_length_indicators(self):
+    message_keys = ['%s%sQ' % (first, second)
+                    for first in 'ABCDE' for second in 'VWXYZ']
+    messages = [encrypt_message('FOL', message_key, 'ANX')
+                for message_key in message_keys]
+    messages[3] = messages[3]._replace(indicator=messages[3].indicator[:4])
+    messages[7] = messages[7]._replace(indicator=messages[7].indicator + 'X')
+    messages.append(encrypt_message('AAA', 'PLM', 'ANX')._replace(
+        indicator='PL'))
+
+    expected = message_keys + [None]
+    expected[3] = None
+    expected[7] = None
+    self.assertTrue(len(messages) - 3 >= daily_key.TRANSLATE_GROUP_SIZE)
+    self.assertEqual(self.daily_key.message_keys(messages), expected)
+
+  def test_translate_indicators(self):
+    indicators = [message.indicator for message in self.messages]
+    self.assertEqual(
+        self.daily_key.translate_indicators('GKD', indicators),
+        [self.daily_key.decrypt_indicator('GKD', indicator)
+         for indicator in indicators])
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -10,6 +10,16 @@ import unittest
 PLUGBOARD_CONFIG = (('A', 'E'), ('M', 'Y'))
 
 
+class RecordingListener(object):
+  """A plugboard listener that records each change it's told about."""
+
+  def __init__(self):
+    self.changes = []
+
+  def plug_swapped(self, first, second):
+    self.changes.append((first, second))
+
+
 class TestRotorMap(unittest.TestCase):
   def setUp(self):
     self.rotor_map = enigma.RotorMap(enigma.ENIGMA_I_1930)
@@ -97,6 +107,43 @@ class TestPlugboard(unittest.TestCase):
     self.assertEqual(self.plugboard.swap_seq_of_pairs(input_map, pairs),
                      'EBCDAFGHIJKLYNOPQRSTUVWXMZ')
 
+  def test_swap(self):
+    self.plugboard.swap('B', 'Z')
+    self.assertEqual(self.plugboard.num_seq_to_letter(self.plugboard.map),
+                     'EZCDAFGHIJKLYNOPQRSTUVWXMB')
+    self.assertEqual(self.plugboard.map, self.plugboard.rev_map)
+    self.assertEqual(self.plugboard.flow('Z'), 'B')
+
+  def test_swap_plugged(self):
+    self.assertRaises(ValueError, self.plugboard.swap, 'A', 'B')
+    self.assertRaises(ValueError, self.plugboard.swap, 'B', 'Y')
+    self.assertRaises(ValueError, self.plugboard.swap, 'B', 'B')
+
+  def test_unswap(self):
+    self.plugboard.unswap('Y', 'M')
+    self.assertEqual(self.plugboard.num_seq_to_letter(self.plugboard.map),
+                     'EBCDAFGHIJKLMNOPQRSTUVWXYZ')
+    self.assertEqual(self.plugboard.map, self.plugboard.rev_map)
+    self.assertFalse(self.plugboard.is_plugged('M'))
+
+  def test_unswap_not_plugged(self):
+    self.assertRaises(ValueError, self.plugboard.unswap, 'A', 'M')
+    self.assertRaises(ValueError, self.plugboard.unswap, 'B', 'C')
+
+  def test_listener(self):
+    listener = RecordingListener()
+    self.plugboard.add_listener(listener)
+    self.plugboard.swap('B', 'C')
+    self.plugboard.unswap('A', 'E')
+    self.assertEqual(listener.changes, [(1, 2), (0, 4)])
+
+  def test_remove_listener(self):
+    listener = RecordingListener()
+    self.plugboard.add_listener(listener)
+    self.plugboard.remove_listener(listener)
+    self.plugboard.swap('B', 'C')
+    self.assertEqual(listener.changes, [])
+
 
 if __name__ == '__main__':
   unittest.main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# Copyright (C) 2015 by Ken Guyton.  All Rights Reserved.
+
+"""Test the keyspace enumeration module."""
+
+import crib
+import enigma_machine
+import keyspace
+import shutil
+import tempfile
+import unittest
+
+
+class TestKeySpace(unittest.TestCase):
+  def setUp(self):
+    self.keyspace = keyspace.KeySpace(reflector_names=('B',),
+                                      ring_settings=('AAA', 'ABC'))
+
+  def test_len(self):
+    self.assertEqual(len(self.keyspace), 6 * 2 * 26 ** 3)
+    self.assertEqual(len(keyspace.KeySpace()), 3 * 6 * 26 ** 6)
+
+  def test_key(self):
+    self.assertEqual(self.keyspace.key(0),
+                     keyspace.Key('B', ('I', 'II', 'III'), 'AAA', 'AAA'))
+    self.assertEqual(self.keyspace.key(27),
+                     keyspace.Key('B', ('I', 'II', 'III'), 'AAA', 'ABB'))
+    self.assertEqual(self.keyspace.key(26 ** 3),
+                     keyspace.Key('B', ('I', 'II', 'III'), 'ABC', 'AAA'))
+    self.assertEqual(self.keyspace.key(len(self.keyspace) - 1),
+                     keyspace.Key('B', ('III', 'II', 'I'), 'ABC', 'ZZZ'))
+
+  def test_shards_cover_keys(self):
+    shards = [self.keyspace.shard(k, 7) for k in range(7)]
+    self.assertEqual(shards[0].start, 0)
+    self.assertEqual(shards[-1].stop, len(self.keyspace))
+    for shard, next_shard in zip(shards, shards[1:]):
+      self.assertEqual(shard.stop, next_shard.start)
+
+  def test_bad_shard(self):
+    self.assertRaises(ValueError, self.keyspace.shard, 3, 3)
+    self.assertRaises(ValueError, self.keyspace.shard, 0, 3,
+                      checkpoint_every=0)
+
+  def test_fingerprint(self):
+    same = keyspace.KeySpace(reflector_names=['B'],
+                             ring_settings=['AAA', 'ABC'])
+    other = keyspace.KeySpace(reflector_names=('C',),
+                              ring_settings=('ZZZ', 'QQQ'))
+    self.assertEqual(same.fingerprint(), self.keyspace.fingerprint())
+    self.assertNotEqual(other.fingerprint(), self.keyspace.fingerprint())
+
+  def test_shard_keys(self):
+    small = keyspace.KeySpace(rotor_names=('I', 'II', 'III'),
+                              reflector_names=('A',), ring_settings=('AAA',))
+    shard = small.shard(2, 5)
+    keys = [key for unused_index, key in shard]
+    self.assertEqual(keys, [small.key(index)
+                            for index in range(shard.start, shard.stop)])
+    self.assertTrue(shard.is_done())
+
+
+class TestCheckpoint(unittest.TestCase):
+  def setUp(self):
+    self.checkpoint_dir = tempfile.mkdtemp()
+    self.keyspace = keyspace.KeySpace(reflector_names=('B',),
+                                      ring_settings=('AAA',))
+
+  def tearDown(self):
+    shutil.rmtree(self.checkpoint_dir)
+
+  def test_resume(self):
+    shard = self.keyspace.shard(1, 4, self.checkpoint_dir, checkpoint_every=10)
+    done = []
+    for index, unused_key in shard:
+      done.append(index)
+      if len(done) == 25:
+        break
+
+    resumed = self.keyspace.shard(1, 4, self.checkpoint_dir)
+    self.assertEqual(resumed.next_index, shard.start + 20)
+
+    rest = [index for index, unused_key in resumed]
+    self.assertEqual(rest[0], shard.start + 20)
+    self.assertEqual(rest[-1], shard.stop - 1)
+    self.assertTrue(self.keyspace.shard(1, 4, self.checkpoint_dir).is_done())
+
+  def test_other_shard_not_resumed(self):
+    shard = self.keyspace.shard(1, 4, self.checkpoint_dir, checkpoint_every=1)
+    for unused_index, unused_key in zip(range(5), shard):
+      pass
+
+    other = self.keyspace.shard(2, 4, self.checkpoint_dir)
+    self.assertEqual(other.next_index, other.start)
+
+  def test_same_size_other_keyspace(self):
+    small = keyspace.KeySpace(reflector_names=('B',),
+                              ring_settings=('AAA', 'ABC'))
+    shard = small.shard(0, 4, self.checkpoint_dir, checkpoint_every=10)
+    for unused_index, unused_key in zip(range(15), shard):
+      pass
+
+    other = keyspace.KeySpace(reflector_names=('C',),
+                              ring_settings=('ZZZ', 'QQQ'))
+    self.assertEqual(len(other), len(small))
+    self.assertRaises(ValueError, other.shard, 0, 4, self.checkpoint_dir)
+
+  def test_mismatched_checkpoint(self):
+    shard = self.keyspace.shard(1, 4, self.checkpoint_dir)
+    shard.write_checkpoint()
+
+    other_keyspace = keyspace.KeySpace(reflector_names=('A', 'B'),
+                                       ring_settings=('AAA',))
+    self.assertRaises(ValueError, other_keyspace.shard, 1, 4,
+                      self.checkpoint_dir)
+
+
+class TestSearch(unittest.TestCase):
+  def test_loader_reuses_machine(self):
+    loader = keyspace.Loader()
+    key = keyspace.Key('B', ('I', 'II', 'III'), 'AAA', 'ADU')
+    machine, state_tables = loader.load(key)
+    self.assertEqual(machine.rotor2.get_shift(), 'D')
+
+    next_machine, next_state_tables = loader.load(key._replace(rings='BCD'))
+    self.assertTrue(next_machine is machine)
+    self.assertTrue(next_state_tables is state_tables)
+    self.assertEqual(machine.rotor3.get_ring(), 'D')
+
+    other_machine, unused_state_tables = loader.load(key._replace(
+        reflector='C'))
+    self.assertFalse(other_machine is machine)
+
+  def test_loader_matches_create_machine(self):
+    loader = keyspace.Loader(enigma_machine.PLUGBOARD_CONFIG)
+    machine, unused_state_tables = loader.load(
+        keyspace.Key('B', ('I', 'II', 'III'), 'AAA', 'AAA'))
+    self.assertEqual(''.join(machine.stream('HELLOWORLD')),
+                     ''.join(enigma_machine.create_machine().stream(
+                         'HELLOWORLD')))
+
+  def test_search(self):
+    ciphertext = ''.join(enigma_machine.create_machine().stream(
+        'XXXWETTERBERICHTXX'))
+    crib_text = 'WETTERBERICHT'
+    offsets = crib.iter_crib_positions(ciphertext, crib_text)
+
+    small = keyspace.KeySpace(reflector_names=('B',), ring_settings=('AAA',))
+    keys = (key for unused_index, key in small.shard(0, 6 * 26))
+    found = list(keyspace.search(keys, ciphertext, crib_text, offsets,
+                                 enigma_machine.PLUGBOARD_CONFIG))
+    self.assertTrue(
+        (keyspace.Key('B', ('I', 'II', 'III'), 'AAA', 'AAA'), 3) in found)
+
+  def test_search_crib_positions(self):
+    ciphertext = ''.join(enigma_machine.create_machine().stream(
+        'XXXWETTERBERICHTXXWETTERBERICHT'))
+    positions = crib.find_crib_positions(ciphertext, 'WETTERBERICHT')
+    key = keyspace.Key('B', ('I', 'II', 'III'), 'AAA', 'AAA')
+    found = list(keyspace.search([key, key._replace(positions='AAB')],
+                                 ciphertext, 'WETTERBERICHT', positions,
+                                 enigma_machine.PLUGBOARD_CONFIG))
+    self.assertEqual(found, [(key, 3), (key, 18)])
+
+    found = list(keyspace.search([key], ciphertext, 'WETTERBERICHT', [3],
+                                 enigma_machine.PLUGBOARD_CONFIG))
+    self.assertEqual(found, [(key, 3)])
+
+  def test_search_scans_offsets(self):
+    ciphertext = ''.join(enigma_machine.create_machine().stream(
+        'XXXWETTERBERICHTXX'))
+    key = keyspace.Key('B', ('I', 'II', 'III'), 'AAA', 'AAA')
+    found = list(keyspace.search([key], ciphertext, 'WETTERBERICHT',
+                                 plugboard_config=(
+                                     enigma_machine.PLUGBOARD_CONFIG)))
+    self.assertEqual(found, [(key, 3)])
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -10,6 +10,7 @@ The sequence is:
 """
 
 import enigma
+import string
 import unittest
 
 PLUGBOARD_CONFIG = (('A', 'E'), ('M', 'Y'))
@@ -53,6 +54,130 @@ class TestRotorshifter(unittest.TestCase):
          ('Y', 'T'), ('G', 'B'), ('V', 'F'), ('R', 'E'), ('D', 'C'),))
     self.assertEqual(''.join(list(self.machine.stream('HELLO'))), 'TDJPK')
 
+  def test_encrypt(self):
+    self.assertEqual(self.machine.encrypt('HELLO'), 'KSUBR')
+
+  def test_encrypt_after_replacing_parts(self):
+    self.assertEqual(self.machine.encrypt('HELLO'), 'KSUBR')
+    self.machine.rotor3.set_shift('A')
+    self.machine.reflector = enigma.Reflector(enigma.REFLECTOR_B)
+    self.machine.plugboard = enigma.PlugBoard(
+        (('P', 'O'), ('M', 'L'), ('I', 'U'), ('K', 'J'), ('N', 'H'),
+         ('Y', 'T'), ('G', 'B'), ('V', 'F'), ('R', 'E'), ('D', 'C'),))
+    self.assertEqual(self.machine.encrypt('HELLO'), 'TDJPK')
+
+  def test_replaced_tables_stop_listening(self):
+    plugboard = self.machine.plugboard
+    self.machine.encrypt('HELLO')
+    self.machine.reflector = enigma.Reflector(enigma.REFLECTOR_B)
+    self.machine.encrypt('HELLO')
+    self.machine.reflector = enigma.Reflector(enigma.REFLECTOR_C)
+    self.machine.encrypt('HELLO')
+    self.assertEqual(plugboard.listeners, [self.machine.state_tables])
+
+    self.machine.plugboard = enigma.PlugBoard(PLUGBOARD_CONFIG)
+    self.machine.encrypt('HELLO')
+    self.assertEqual(plugboard.listeners, [])
+    self.assertEqual(self.machine.plugboard.listeners,
+                     [self.machine.state_tables])
+
+  def test_encrypt_matches_stream(self):
+    text = string.ascii_uppercase * 30
+    self.rotor_shifter2.double_step = True
+    self.rotor_shifter3.set_ring('F')
+    expected = ''.join(self.machine.stream(text))
+
+    self.rotor_shifter1.set_shift('A')
+    self.rotor_shifter2.set_shift('A')
+    self.rotor_shifter3.set_shift('A')
+    self.assertEqual(self.machine.encrypt(text), expected)
+
+  def test_stream_chunks(self):
+    text = string.ascii_uppercase * 10
+    expected = self.machine.encrypt(text)
+
+    self.rotor_shifter1.set_shift('A')
+    self.rotor_shifter2.set_shift('A')
+    self.rotor_shifter3.set_shift('A')
+    chunks = [text[:7], text[7:100], text[100:]]
+    self.assertEqual(''.join(self.machine.stream_chunks(chunks, 30)), expected)
+
+  def test_stream_chunks_bytes(self):
+    output = list(self.machine.stream_chunks([b'HEL', b'LO']))
+    self.assertEqual(output, [b'KSU', b'BR'])
+
+  def test_stream_chunks_types(self):
+    chunks = [u'HEL', b'LO', bytearray(b'WOR'), 'LD']
+    output = list(self.machine.stream_chunks(chunks))
+    self.assertEqual([type(chunk) for chunk in output],
+                     [type(chunk) for chunk in chunks])
+
+    self.rotor_shifter1.set_shift('A')
+    self.rotor_shifter2.set_shift('A')
+    self.rotor_shifter3.set_shift('A')
+    decrypted = list(self.machine.stream_chunks(output))
+    self.assertEqual(decrypted, chunks)
+
+
+class TestStateTables(unittest.TestCase):
+  def setUp(self):
+    rotor_shifter1 = enigma.RotorShifter(enigma.RotorMap(enigma.ENIGMA_I_1930),
+                                         turnover_letter='Q')
+    rotor_shifter2 = enigma.RotorShifter(
+        enigma.RotorMap(enigma.ENIGMA_II_1930), next_shifter=rotor_shifter1,
+        turnover_letter='E')
+    rotor_shifter3 = enigma.RotorShifter(
+        enigma.RotorMap(enigma.ENIGMA_III_1930), next_shifter=rotor_shifter2,
+        turnover_letter='V')
+    rotor_shifter2.double_step = True
+
+    self.machine = enigma.Machine(rotor1=rotor_shifter1,
+                                  rotor2=rotor_shifter2,
+                                  rotor3=rotor_shifter3,
+                                  reflector=enigma.Reflector(
+                                      enigma.REFLECTOR_B),
+                                  plugboard=enigma.PlugBoard(PLUGBOARD_CONFIG))
+    self.state_tables = enigma.StateTables(self.machine)
+
+  def _flow_table(self):
+    """Return the current flow of the machine as a str of 26 letters."""
+
+    return ''.join([self.machine.flow(letter)
+                    for letter in string.ascii_uppercase])
+
+  def _table(self):
+    """Return the current compiled table as a str of 26 letters."""
+
+    return self.machine.plugboard.num_seq_to_letter(self.state_tables.table())
+
+  def test_table(self):
+    self.assertEqual(self._table(), self._flow_table())
+    self.machine.rotor3.step()
+    self.assertEqual(self._table(), self._flow_table())
+    self.assertEqual(len(self.state_tables.tables), 2)
+
+  def test_table_cached(self):
+    table = self.state_tables.table()
+    self.assertTrue(self.state_tables.table() is table)
+
+  def test_patched_on_swap(self):
+    tables = []
+    for unused_count in range(30):
+      tables.append(self.state_tables.table())
+      self.machine.rotor3.step()
+    self.machine.rotor3.set_shift('A')
+    self.machine.rotor2.set_shift('A')
+    self.machine.rotor1.set_shift('A')
+
+    self.machine.plugboard.swap('B', 'Q')
+    self.machine.plugboard.unswap('M', 'Y')
+    self.machine.plugboard.swap('M', 'Z')
+
+    for table in tables:
+      self.assertTrue(self.state_tables.table() is table)
+      self.assertEqual(self._table(), self._flow_table())
+      self.machine.rotor3.step()
+
 
 if __name__ == '__main__':
   unittest.main()
@@ -32,6 +32,7 @@ class TestRotorshifter(unittest.TestCase):
     self.assertEqual(self.rotor_shifter.next_shifter, self.rotor_shifter2)
     self.assertEqual(self.rotor_shifter.shift, 2)
     self.assertEqual(self.rotor_shifter.turnover, 12)
+    self.assertEqual(self.rotor_shifter.ring, 0)
 
   def test_flow(self):
     self.assertEqual(self.rotor_shifter.flow('A'), 'E')
@@ -90,6 +91,23 @@ class TestRotorshifter(unittest.TestCase):
     self.assertEqual(self.rotor_shifter.reverse_flow('K'), 'A')
     self.assertEqual(self.rotor_shifter.reverse_flow('D'), 'B')
 
+  def test_ring(self):
+    self.assertEqual(self.rotor_shifter.ring, 0)
+    self.rotor_shifter.set_ring('B')
+    self.assertEqual(self.rotor_shifter.get_ring(), 'B')
+    self.assertEqual(self.rotor_shifter.wiring_offset(), 25)
+    self.assertEqual(self.rotor_shifter.flow('A'), 'K')
+    self.assertEqual(self.rotor_shifter.reverse_flow('K'), 'A')
+
+  def test_ring_same_offset(self):
+    self.rotor_shifter.set_ring('C')
+    self.rotor_shifter.set_shift('E')
+    flow = self.rotor_shifter.flow('M')
+
+    self.rotor_shifter.set_ring('A')
+    self.rotor_shifter.set_shift('C')
+    self.assertEqual(self.rotor_shifter.flow('M'), flow)
+
   def _shift_positions(self, rs1, rs2, rs3):
     """Return the shift positions of the three rotors I-II-III as a str."""
 